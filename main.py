@@ -6,16 +6,40 @@ import matplotlib.pyplot as plt
 import os
 import datetime
 from models.simulation import PPModel  # Import your Mesa model
-from models.agents.grass import Grass  # Updated import
-from models.agents.herbivore import Herbivore  # Updated import
-from models.agents.predator import Predator  # Import the predator class
 
 # Simulation parameters
 GRID_CELL_SIZE = 10  # Size (in pixels) for each grid cell.
-STEP_DELAY = 0.1  # Delay between simulation steps (in seconds).
+STEP_DELAY = 0.1  # Delay between simulation steps (in seconds); 0 runs as fast as possible.
+FRAME_RATE = 30  # Display refresh rate (frames per second).
+FRAME_BUDGET = 1.0 / FRAME_RATE  # Time (in seconds) steps may take before the next frame is drawn.
 WINDOW_MARGIN = 20  # Margin around the grid display.
 
 
+# Cell-border overlays, built once per grid size.
+_gridlines_surfaces = {}
+
+
+def get_gridlines_surface(width, height):
+    """
+    Returns a transparent surface with the cell borders for a grid of the
+    given size. The surface is drawn once and reused on every frame.
+    """
+    key = (width, height)
+    if key not in _gridlines_surfaces:
+        surface_width, surface_height = width * GRID_CELL_SIZE, height * GRID_CELL_SIZE
+        surface = pygame.Surface((surface_width, surface_height), pygame.SRCALPHA)
+        # Every cell gets a 1px border, so each cell boundary is drawn on
+        # both of its sides: the first and last pixel row/column of a cell.
+        for x in range(width):
+            for line_x in (x * GRID_CELL_SIZE, (x + 1) * GRID_CELL_SIZE - 1):
+                pygame.draw.line(surface, (40, 40, 40, 255), (line_x, 0), (line_x, surface_height - 1))
+        for y in range(height):
+            for line_y in (y * GRID_CELL_SIZE, (y + 1) * GRID_CELL_SIZE - 1):
+                pygame.draw.line(surface, (40, 40, 40, 255), (0, line_y), (surface_width - 1, line_y))
+        _gridlines_surfaces[key] = surface
+    return _gridlines_surfaces[key]
+
+
 def draw_grid(screen, model):
     """
     Draws the grid, coloring each cell's background based on grass count
@@ -23,56 +47,42 @@ def draw_grid(screen, model):
     - Herbivores: blue circles
     - Predators: red circles
     - Grass: green background
+
+    The background is built from the grid's grass counts as one image and
+    blitted in a single call; circles are only drawn for occupied cells.
     """
     width, height = model.grid.width, model.grid.height
+    radius = GRID_CELL_SIZE // 2 - 1
 
-    # Loop over grid cells
-    for x in range(width):
-        for y in range(height):
-            # Get agents in the cell:
-            cell_agents = model.grid.get_cell_list_contents((x, y))
-
-            # Count Grass, Herbivores, and Predators
-            num_grass = sum(1 for agent in cell_agents if isinstance(agent, Grass))
-            num_herbivores = sum(1 for agent in cell_agents if isinstance(agent, Herbivore))
-            num_predators = sum(1 for agent in cell_agents if isinstance(agent, Predator))
+    # Green background: the more grass agents, the brighter the green (capped at full green).
+    green_intensity = np.minimum(model.grid.grass_count * 75, 255).astype(np.uint8)  # adjust scaling factor as needed
+    cell_colors = np.zeros((width, height, 3), dtype=np.uint8)
+    cell_colors[..., 1] = green_intensity
+    background = pygame.transform.scale(pygame.surfarray.make_surface(cell_colors),
+                                        (width * GRID_CELL_SIZE, height * GRID_CELL_SIZE))
+    screen.blit(background, (WINDOW_MARGIN, WINDOW_MARGIN))
 
-            # Determine cell color: base black, then add green if grass is present.
-            # The more grass agents, the brighter the green (capped at full green).
-            green_intensity = min(255, int(num_grass * 75))  # adjust scaling factor as needed
-            cell_color = (0, green_intensity, 0)
+    # Draw grid cell borders for clarity.
+    screen.blit(get_gridlines_surface(width, height), (WINDOW_MARGIN, WINDOW_MARGIN))
 
-            # Calculate pixel rectangle for the cell:
-            rect = pygame.Rect(WINDOW_MARGIN + x * GRID_CELL_SIZE,
-                               WINDOW_MARGIN + y * GRID_CELL_SIZE,
-                               GRID_CELL_SIZE, GRID_CELL_SIZE)
+    # Draw herbivores as blue circles, then predators as red circles
+    # (on top of herbivores if both present)
+    for counts, color in ((model.grid.herb_count, (0, 0, 255)),
+                          (model.grid.pred_count, (255, 0, 0))):
+        for x, y in np.argwhere(counts):
+            center = (WINDOW_MARGIN + x * GRID_CELL_SIZE + GRID_CELL_SIZE // 2,
+                      WINDOW_MARGIN + y * GRID_CELL_SIZE + GRID_CELL_SIZE // 2)
+            pygame.draw.circle(screen, color, center, radius)
 
-            pygame.draw.rect(screen, cell_color, rect)
 
-            # Draw herbivores as blue circles
-            if num_herbivores > 0:
-                center = (WINDOW_MARGIN + x * GRID_CELL_SIZE + GRID_CELL_SIZE // 2,
-                          WINDOW_MARGIN + y * GRID_CELL_SIZE + GRID_CELL_SIZE // 2)
-                radius = GRID_CELL_SIZE // 2 - 1
-                pygame.draw.circle(screen, (0, 0, 255), center, radius)  # Blue for herbivores
-
-            # Draw predators as red circles (on top of herbivores if both present)
-            if num_predators > 0:
-                center = (WINDOW_MARGIN + x * GRID_CELL_SIZE + GRID_CELL_SIZE // 2,
-                          WINDOW_MARGIN + y * GRID_CELL_SIZE + GRID_CELL_SIZE // 2)
-                radius = GRID_CELL_SIZE // 2 - 1
-                pygame.draw.circle(screen, (255, 0, 0), center, radius)  # Red for predators
-
-            # Draw grid cell border for clarity.
-            pygame.draw.rect(screen, (40, 40, 40), rect, 1)
-
-
-def save_simulation_data(model, filename=None):
+def save_simulation_data(model, filename=None, data=None):
     """
     Save the simulation data to a CSV file
+    (data: the datacollector's DataFrame, if already built)
     """
     # Get data from datacollector
-    data = model.datacollector.get_model_vars_dataframe()
+    if data is None:
+        data = model.datacollector.get_model_vars_dataframe()
     
     # Create directory for data if it doesn't exist
     os.makedirs('simulation_data', exist_ok=True)
@@ -89,12 +99,14 @@ def save_simulation_data(model, filename=None):
     return filename
 
 
-def plot_simulation_data(model, save_plots=False, data_file=None):
+def plot_simulation_data(model, save_plots=False, data_file=None, data=None):
     """
     Plot various graphs of the simulation data after the simulation ends
+    (data: the datacollector's DataFrame, if already built)
     """
     # Get data from the datacollector
-    data = model.datacollector.get_model_vars_dataframe()
+    if data is None:
+        data = model.datacollector.get_model_vars_dataframe()
     
     # Create a figure with subplots
     plt.figure(figsize=(15, 10))
@@ -224,6 +236,8 @@ def run_interactive_simulation():
     window_height = grid_height * GRID_CELL_SIZE + 2 * WINDOW_MARGIN
 
     screen = pygame.display.set_mode((window_width, window_height))
+    # Build the cell-border overlay up front instead of on the first frame
+    get_gridlines_surface(grid_width, grid_height)
     pygame.display.set_caption("Predator-Prey Simulation with Fuzzy Logic")
 
     clock = pygame.time.Clock()
@@ -238,15 +252,21 @@ def run_interactive_simulation():
     print("Q: Quit simulation and show plots")
     print("\nSimulation uses fuzzy logic for agent decision making")
 
+    last_step_time = time.perf_counter()
+    needs_redraw = True  # Whether the model or status changed since the last frame
+
     while running:
         # Process Pygame events.
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
+            if event.type == pygame.VIDEOEXPOSE:
+                needs_redraw = True
             # Process key presses
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     step_mode = not step_mode
+                    needs_redraw = True
                     print("Simulation " + ("paused" if step_mode else "resumed"))
                 elif event.key == pygame.K_s:
                     # Save data when 's' is pressed
@@ -255,14 +275,32 @@ def run_interactive_simulation():
                     # Quit and show plots when 'q' is pressed
                     running = False
 
-        # In automatic mode, we update every STEP_DELAY seconds.
+        # In automatic mode, run the steps that fell due since the last frame
+        # (one every STEP_DELAY seconds), independently of the frame rate,
+        # for at most one frame's worth of time.
         if not step_mode:
-            time.sleep(STEP_DELAY)
-            # Advance the simulation by one step.
-            model.step()
+            now = time.perf_counter()
+            frame_deadline = now + FRAME_BUDGET
+            steps_this_frame = 0
+            while now - last_step_time >= STEP_DELAY and now < frame_deadline:
+                model.step()
+                last_step_time += STEP_DELAY
+                steps_this_frame += 1
+                now = time.perf_counter()
+            if steps_this_frame:
+                needs_redraw = True
+            if now - last_step_time >= STEP_DELAY:
+                # Can't keep up - drop the backlog instead of falling further behind
+                last_step_time = now
         else:
-            # If in pause mode, just wait
-            clock.tick(10)  # Lower frame rate while waiting.
+            # If in pause mode, just wait; resume from the current time
+            last_step_time = time.perf_counter()
+
+        if not needs_redraw:
+            # Nothing changed since the last frame; keep it on screen
+            clock.tick(FRAME_RATE)
+            continue
+        needs_redraw = False
 
         # Clear the screen.
         screen.fill((0, 0, 0))
@@ -270,7 +308,7 @@ def run_interactive_simulation():
         draw_grid(screen, model)
         
         # Draw status information on the screen
-        step_count = len(model.datacollector.get_model_vars_dataframe())
+        step_count = model.steps  # Mesa's step counter; one data row is collected per step
         font = pygame.font.SysFont('Arial', 16)
         text = font.render(f"Step: {step_count} | {'PAUSED' if step_mode else 'RUNNING'}", True, (255, 255, 255))
         screen.blit(text, (10, 5))
@@ -286,14 +324,18 @@ def run_interactive_simulation():
         
         # Update the display
         pygame.display.flip()
+        clock.tick(FRAME_RATE)
 
     pygame.quit()
     
+    # Build the collected data once for both saving and plotting
+    data = model.datacollector.get_model_vars_dataframe()
+    
     # Save final data
-    data_file = save_simulation_data(model)
+    data_file = save_simulation_data(model, data=data)
     
     # Plot data after simulation ends
-    plot_simulation_data(model, save_plots=True, data_file=data_file)
+    plot_simulation_data(model, save_plots=True, data_file=data_file, data=data)
     
     # Exit the program after plots are closed
     sys.exit()
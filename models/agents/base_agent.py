@@ -1,46 +1,49 @@
 import mesa
 import random
 
+# Moore neighborhood offsets, in the order get_neighborhood() lists the cells
+MOORE_DIRECTIONS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
 class Animal(mesa.Agent):
     """Base class for all animals in the simulation"""
     
+    blocks_movement = True  # Animals block movement of other animals
+    
     def __init__(self, model, energy, max_energy):
         super().__init__(model)
         self.energy = energy
         self.max_energy = max_energy
         self.steps_without_food = 0
-        self.blocks_movement = True  # Animals block movement of other animals
     
     def _check_position(self):
         """Check if the agent has a valid position on the grid"""
-        return hasattr(self, "pos") and self.pos is not None
+        return self.pos is not None
     
     def get_neighbors(self, include_center=False):
-        """Get neighboring cells if the agent has a valid position"""
-        if not self._check_position():
-            return []
-            
-        try:
-            return self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=include_center)
-        except Exception as e:
-            print(f"Error getting neighbors: {e}")
-            return []
+        """Get the cells neighboring the agent's position"""
+        # Mesa memoizes neighborhoods per (pos, moore, include_center, radius),
+        # so repeated calls for the same cell are a dictionary lookup
+        return self.model.grid.get_neighborhood(
+            self.pos, moore=True, include_center=include_center)
     
     def move_to(self, new_pos):
         """Move the agent to a new position"""
-        if not self._check_position() or not new_pos:
+        if not new_pos:
             return False
             
-        try:
-            self.model.grid.move_agent(self, new_pos)
-            return True
-        except Exception as e:
-            print(f"Move error: {e}")
-            return False
+        self.model.grid.move_agent(self, new_pos)
+        return True
     
     def random_move(self):
         """Move randomly to a neighboring cell"""
+        grid = self.model.grid
+        if grid.torus and grid.width >= 3 and grid.height >= 3:
+            # On a torus at least 3 cells wide and high every cell has 8
+            # distinct neighbors, so pick a direction directly (the same
+            # draw random.choice makes over the neighborhood). Smaller tori
+            # wrap onto fewer cells, so they use the neighborhood itself.
+            dx, dy = MOORE_DIRECTIONS[random.randrange(8)]
+            return self.move_to(((self.pos[0] + dx) % grid.width, (self.pos[1] + dy) % grid.height))
         neighbors = self.get_neighbors()
         if neighbors:
             new_pos = random.choice(neighbors)
@@ -48,18 +51,16 @@ class Animal(mesa.Agent):
         return False
     
     def die(self):
-        """Remove the agent from the grid when it dies"""
+        """Remove the agent from the grid and the model when it dies"""
         if self._check_position():
-            try:
-                self.model.grid.remove_agent(self)
-            except Exception as e:
-                print(f"Death error: {e}")
+            self.model.grid.remove_agent(self)
+            self.remove()
     
     def reduce_energy(self, hunger_levels):
         """Reduce energy based on hunger levels
         
         Args:
-            hunger_levels: List of tuples (threshold, energy_loss)
+            hunger_levels: Sequence of tuples (threshold, energy_loss)
                 in decreasing order of threshold
         """
         for threshold, energy_loss in hunger_levels:
@@ -75,16 +76,10 @@ class Animal(mesa.Agent):
 
     def place_offspring(self, offspring):
         """Find a place for the offspring near the parent"""
-        if not self._check_position():
-            return False
-            
-        try:
-            neighbors = self.get_neighbors(include_center=True)
-            if neighbors:
-                baby_pos = random.choice(neighbors)
-                self.model.grid.place_agent(offspring, baby_pos)
-                return True
-        except Exception as e:
-            print(f"Placing offspring error: {e}")
+        neighbors = self.get_neighbors(include_center=True)
+        if neighbors:
+            baby_pos = random.choice(neighbors)
+            self.model.grid.place_agent(offspring, baby_pos)
+            return True
         
         return False 
\ No newline at end of file
@@ -3,6 +3,19 @@ import random
 import math
 
 
+# (is_herbivore, is_omnivore) flags per agent class, looked up once per class
+_species_flags = {}
+
+
+def _species_of(agent):
+    """Return the (is_herbivore, is_omnivore) flags of the agent's class"""
+    flags = _species_flags.get(type(agent))
+    if flags is None:
+        flags = _species_flags[type(agent)] = (getattr(agent, "is_herbivore", False),
+                                                getattr(agent, "is_omnivore", False))
+    return flags
+
+
 class Carnivore(mesa.Agent):
     """
     A carnivore agent.
@@ -32,11 +45,15 @@ class Carnivore(mesa.Agent):
             prey (list): List of herbivore agents in neighboring cells.
             omnivores (list): List of omnivore agents in neighboring cells.
         """
-        neighbors = self.model.grid.get_neighbors(self.pos, moore=True, include_center=False)
-        # Assume herbivores have an attribute "is_herbivore" set to True
-        prey = [agent for agent in neighbors if getattr(agent, "is_herbivore", False)]
-        # Assume omnivores have an attribute "is_omnivore" set to True
-        omnivores = [agent for agent in neighbors if getattr(agent, "is_omnivore", False)]
+        prey, omnivores = [], []
+        # Sort the neighbors in a single pass. Assume herbivores have an attribute
+        # "is_herbivore" set to True and omnivores an attribute "is_omnivore".
+        for agent in self.model.grid.iter_neighbors(self.pos, moore=True, include_center=False):
+            is_herbivore, is_omnivore = _species_of(agent)
+            if is_herbivore:
+                prey.append(agent)
+            if is_omnivore:
+                omnivores.append(agent)
         return prey, omnivores
 
     def move(self):
@@ -54,9 +71,9 @@ class Carnivore(mesa.Agent):
         """
         x, y = self.pos
         target_x, target_y = target_pos
-        # Determine step direction (simple step by 1)
-        step_x = 1 if target_x > x else -1 if target_x < x else 0
-        step_y = 1 if target_y > y else -1 if target_y < y else 0
+        # Determine step direction (simple step by 1): sign of the offset, without branching
+        step_x = (target_x > x) - (target_x < x)
+        step_y = (target_y > y) - (target_y < y)
         new_position = (x + step_x, y + step_y)
         if not self.model.grid.out_of_bounds(new_position):
             self.model.grid.move_agent(self, new_position)
@@ -73,10 +90,16 @@ class Carnivore(mesa.Agent):
         Returns:
             bool: True if a successful hunt occurred, False otherwise.
         """
-        cell_agents = self.model.grid.get_cell_list_contents([self.pos])
-        # Identify herbivores and omnivores in the current cell.
-        local_herbivores = [agent for agent in cell_agents if getattr(agent, "is_herbivore", False)]
-        local_omnivores = [agent for agent in cell_agents if getattr(agent, "is_omnivore", False)]
+        # Identify herbivores, omnivores and carnivores in the current cell in one pass.
+        local_herbivores, local_omnivores, local_carnivores = [], [], []
+        for agent in self.model.grid.iter_cell_list_contents([self.pos]):
+            is_herbivore, is_omnivore = _species_of(agent)
+            if is_herbivore:
+                local_herbivores.append(agent)
+            if is_omnivore:
+                local_omnivores.append(agent)
+            if type(agent) is Carnivore:
+                local_carnivores.append(agent)
 
         if local_herbivores:
             # Hunt one herbivore
@@ -87,7 +110,6 @@ class Carnivore(mesa.Agent):
             return True
         elif local_omnivores:
             # To successfully hunt an omnivore, require at least one other carnivore in the same cell
-            local_carnivores = [agent for agent in cell_agents if isinstance(agent, Carnivore)]
             if len(local_carnivores) >= 2:
                 target = random.choice(local_omnivores)
                 self.energy += target.energy_value
@@ -104,7 +126,10 @@ class Carnivore(mesa.Agent):
         reproduction_threshold = 20  # Example threshold; adjust as needed
         if self.energy >= reproduction_threshold:
             possible_steps = self.model.grid.get_neighborhood(self.pos, moore=True, include_center=False)
-            free_cells = [pos for pos in possible_steps if self.model.grid.is_cell_empty(pos)]
+            # A cell is free when its agent list is empty (is_cell_empty() would
+            # build a fresh empty list to compare against for every cell)
+            grid = self.model.grid
+            free_cells = [pos for pos in possible_steps if not grid[pos]]
             if free_cells:
                 new_pos = random.choice(free_cells)
                 offspring_energy = self.energy / 2
@@ -147,9 +172,14 @@ class Carnivore(mesa.Agent):
             # Look around for prey in neighboring cells
             prey, omnivores = self.look_around()
             if prey:
-                # Move towards the nearest herbivore
-                closest_prey = min(prey,
-                                   key=lambda agent: abs(agent.pos[0] - self.pos[0]) + abs(agent.pos[1] - self.pos[1]))
+                # Move towards the nearest herbivore (the first one found on ties)
+                x, y = self.pos
+                closest_prey, closest_dist = None, None
+                for agent in prey:
+                    prey_x, prey_y = agent.pos
+                    dist = abs(prey_x - x) + abs(prey_y - y)
+                    if closest_dist is None or dist < closest_dist:
+                        closest_prey, closest_dist = agent, dist
                 self.move_towards(closest_prey.pos)
             elif omnivores:
                 # Attempt to join group: if not enough carnivores in current cell,
@@ -1,38 +1,41 @@
-import mesa
-import random
+import numpy as np
 from models.config import GRASS_SPREAD_CHANCE
 
-class Grass(mesa.Agent):
-    """Simple Grass agent that can grow and spread to neighboring cells"""
-    
-    def __init__(self, model):
-        super().__init__(model)
-        self.is_grass = True
-        
-    def step(self):
-        """Try to spread to a neighboring cell with a small chance"""
-        if random.random() < GRASS_SPREAD_CHANCE:
-            self._try_spread()
-    
-    def _try_spread(self):
-        """Attempt to spread to a neighboring empty cell"""
-        try:
-            if hasattr(self, "pos") and self.pos is not None:
-                # Get neighboring cells
-                neighbors = self.model.grid.get_neighborhood(
-                    self.pos, moore=True, include_center=False)
-                
-                if not neighbors:
-                    return
-                    
-                # Choose a random neighbor cell
-                new_pos = random.choice(neighbors)
-                
-                # Check if it's empty (no grass)
-                cell_content = self.model.grid.get_cell_list_contents([new_pos])
-                if not any(hasattr(a, 'is_grass') for a in cell_content):
-                    # Create and place new grass
-                    new_grass = Grass(self.model)
-                    self.model.grid.place_agent(new_grass, new_pos)
-        except Exception as e:
-            print(f"Grass growth error: {e}") 
\ No newline at end of file
+# Offsets of the 8 cells in a Moore neighborhood
+MOORE_OFFSETS = np.array([(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)])
+
+
+def spread_grass(grid, rng, chance=GRASS_SPREAD_CHANCE):
+    """Let every grass cell spread to a random neighboring cell with a small chance
+
+    Grass is not an agent: it lives in the grid's grass_count array, so the
+    whole lawn is updated in one pass per step. New grass only grows on
+    cells that have none yet.
+
+    Args:
+        grid: The model's CountingMultiGrid
+        rng: NumPy random generator to draw from
+        chance: Chance for each grass cell to spread this step
+
+    Returns:
+        Number of cells the grass spread to
+    """
+    spreading = (grid.grass_count > 0) & (rng.random(grid.grass_count.shape) < chance)
+    sources = np.argwhere(spreading)
+    if not len(sources):
+        return 0
+
+    # Pick one neighboring cell for each spreading cell
+    targets = sources + MOORE_OFFSETS[rng.integers(0, len(MOORE_OFFSETS), len(sources))]
+    if grid.torus:
+        targets %= (grid.width, grid.height)
+    else:
+        inside = ((targets >= 0) & (targets < (grid.width, grid.height))).all(axis=1)
+        targets = targets[inside]
+
+    # Only empty cells get new grass, and each of them only once
+    targets = np.unique(targets, axis=0)
+    targets = targets[grid.grass_count[targets[:, 0], targets[:, 1]] == 0]
+    for x, y in targets:
+        grid.add_grass((int(x), int(y)))
+    return len(targets)
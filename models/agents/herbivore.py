@@ -1,8 +1,8 @@
-import mesa
+import heapq
 import random
-import math
 from models.agents.base_agent import Animal
 from models.fuzzy_brain import HerbivoreBrain
+from models.kernels import nearest_occupied
 from models.config import (
     HERBIVORE_INIT_ENERGY, 
     HERBIVORE_MAX_ENERGY,
@@ -15,115 +15,96 @@ from models.config import (
     GRASS_ENERGY_VALUE
 )
 
-# Import for type checking only, not at runtime to avoid circular imports
-from typing import TYPE_CHECKING
-if TYPE_CHECKING:
-    from models.agents.predator import Predator
+# Steps without food up to which energy is only lost by chance
+LOWEST_HUNGER_THRESHOLD = HERBIVORE_HUNGER_LEVELS[-1][0]
+
+
+def _rounded_share(a, b, length):
+    """
+    Return round(a / hypot(a, b) * length) using integer arithmetic only
+
+    The vector (a, b) is a difference of cell coordinates, so comparing
+    squares against the rounding boundaries (odd multiples of 1/2) gives
+    the same result as normalizing it with a square root. For integer
+    vectors and lengths of 1 or 2 cells no value falls exactly halfway.
+    """
+    scaled = 4 * length * length * a * a
+    norm = a * a + b * b
+    cells = 0
+    for odd in range(1, 2 * length, 2):
+        if scaled > odd * odd * norm:
+            cells += 1
+    return cells if a > 0 else -cells
 
-# Simple Grass class
-class Grass(mesa.Agent):
-    def __init__(self, model):
-        super().__init__(model)
-        self.is_grass = True
-        
-    def step(self):
-        # Very simple growth - rare chance to spread to neighbor
-        if random.random() < 0.05:
-            try:
-                # Try to get neighbors
-                if hasattr(self, "pos") and self.pos is not None:
-                    neighbors = self.model.grid.get_neighborhood(
-                        self.pos, moore=True, include_center=False)
-                    if neighbors:
-                        # Choose a random neighbor cell
-                        new_pos = random.choice(neighbors)
-                        # Check if it's empty
-                        cell_content = self.model.grid.get_cell_list_contents([new_pos])
-                        if not any(hasattr(a, 'is_grass') for a in cell_content):
-                            # Create and place new grass
-                            new_grass = Grass(self.model)
-                            self.model.grid.place_agent(new_grass, new_pos)
-                            # Don't try to use scheduler
-            except Exception as e:
-                print(f"Grass growth error: {e}")
 
 class Herbivore(Animal):
     """Herbivore agent that eats grass and can reproduce"""
     
+    is_herbivore = True
+    brain = HerbivoreBrain()  # Fuzzy brain, stateless and shared by all herbivores
+    
     def __init__(self, model, energy=HERBIVORE_INIT_ENERGY, max_energy=HERBIVORE_MAX_ENERGY):
         super().__init__(model, energy, max_energy)
-        self.is_herbivore = True
-        self.brain = HerbivoreBrain()  # Initialize fuzzy brain
         self.sprint_cooldown = 0  # Cooldown tracker for sprint ability
     
     def step(self):
         """Perform one step of the herbivore's behavior"""
-        try:
-            # Update sprint cooldown
-            if self.sprint_cooldown > 0:
-                self.sprint_cooldown -= 1
-                
-            # Increment hunger counter
-            self.steps_without_food += 1
-            
-            # Apply hunger effects with configurable levels
-            hunger_levels = list(HERBIVORE_HUNGER_LEVELS)
+        # Update sprint cooldown
+        if self.sprint_cooldown > 0:
+            self.sprint_cooldown -= 1
             
-            # Special case for the lowest hunger level which has a random chance
-            if self.steps_without_food <= hunger_levels[-1][0] and random.random() >= HERBIVORE_ENERGY_LOSS_CHANCE:
-                # Skip energy loss this turn (80% chance when not very hungry)
-                pass
-            else:
-                # Apply standard energy reduction based on hunger level
-                if not self.reduce_energy(hunger_levels):
-                    return  # Animal died of starvation
-            
-            # Reduced scanning range for predators - was too good at detecting
-            predator_info = self._scan_for_predators(radius=3)  # Reduced from 5 to 3
-            
-            # Get environmental inputs
-            inputs = self._gather_inputs(predator_info)
-            
-            # Get decision from fuzzy brain
-            decision = self.brain.decide(inputs)
-            
-            # Act based on decision
-            self._execute_decision(decision)
-                    
-        except Exception as e:
-            print(f"Herbivore step error: {e}")
+        # Increment hunger counter
+        self.steps_without_food += 1
+        
+        # Apply hunger effects with configurable levels
+        # Special case for the lowest hunger level which has a random chance
+        if self.steps_without_food <= LOWEST_HUNGER_THRESHOLD and random.random() >= HERBIVORE_ENERGY_LOSS_CHANCE:
+            # Skip energy loss this turn (80% chance when not very hungry)
+            pass
+        else:
+            # Apply standard energy reduction based on hunger level
+            if not self.reduce_energy(HERBIVORE_HUNGER_LEVELS):
+                return  # Animal died of starvation
+        
+        # Reduced scanning range for predators - was too good at detecting
+        predator_info = self._scan_for_predators(radius=3)  # Reduced from 5 to 3
+        
+        # Get environmental inputs
+        inputs = self._gather_inputs(predator_info)
+        
+        # Get decision from fuzzy brain
+        decision = self.brain.decide(inputs)
+        
+        # Act based on decision
+        self._execute_decision(decision, predator_info)
     
     def _scan_for_predators(self, radius=5):
         """Scan surroundings for predators with enhanced detection"""
-        if not self._check_position():
-            return {"detected": False, "closest_dist": float('inf'), "predator_cells": []}
-            
-        try:
-            # Get a wider view of surroundings
-            neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=False, radius=radius)
-                
-            # Track predator positions and closest distance
-            predator_cells = []
-            closest_dist = float('inf')
-            
-            for cell in neighborhood:
-                cell_content = self.model.grid.get_cell_list_contents([cell])
-                for agent in cell_content:
-                    if hasattr(agent, 'is_predator') and agent.is_predator:
-                        dist = self._calculate_distance(self.pos, cell)
-                        predator_cells.append((cell, dist))  # Store both cell and distance
-                        closest_dist = min(closest_dist, dist)
-            
-            return {
-                "detected": len(predator_cells) > 0,
-                "closest_dist": closest_dist,
-                "predator_cells": predator_cells
-            }
-                
-        except Exception as e:
-            print(f"Predator scanning error: {e}")
-            return {"detected": False, "closest_dist": float('inf'), "predator_cells": []}
+        # No predator within sight of this cell - nothing to scan for
+        grid = self.model.grid
+        if radius <= grid.near_radius and not grid.pred_near[self.pos]:
+            return {"detected": False, "closest_dist": float('inf'), "closest_cell": None, "predator_cells": []}
+
+        # Track predator positions and the closest one
+        predator_cells = []
+        closest_dist = float('inf')
+        closest_cell = None
+        
+        # Only visit the cells of a wider view that hold predators
+        x, y = self.pos
+        for cell, count in grid.occupied_cells(grid.pred_count, self.pos, radius):
+            dist = abs(cell[0] - x) + abs(cell[1] - y)  # Manhattan distance
+            predator_cells.extend([(cell, dist)] * count)  # Store both cell and distance, once per predator
+            if dist < closest_dist:
+                closest_dist = dist
+                closest_cell = cell
+        
+        return {
+            "detected": len(predator_cells) > 0,
+            "closest_dist": closest_dist,
+            "closest_cell": closest_cell,
+            "predator_cells": predator_cells
+        }
     
     def _gather_inputs(self, predator_info=None):
         """Gather environmental inputs for the fuzzy brain"""
@@ -134,55 +115,38 @@ class Herbivore(Animal):
             "predator_proximity": 6  # Default: no predators visible
         }
         
-        if not self._check_position():
-            return inputs
-            
-        try:
-            # Get surrounding cells
-            neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=False, radius=3)
-                
-            # Check for food (grass)
-            closest_food_dist = float('inf')
-            for cell in neighborhood:
-                cell_content = self.model.grid.get_cell_list_contents([cell])
-                for agent in cell_content:
-                    if hasattr(agent, 'is_grass') and agent.is_grass:
-                        dist = self._calculate_distance(self.pos, cell)
-                        closest_food_dist = min(closest_food_dist, dist)
+        grid = self.model.grid
+        x, y = self.pos
+
+        # Get the cells within sight
+        xs, ys = grid.window_axes(self.pos, 3)
             
+        # Check for food (grass), unless there is none within sight
+        if grid.grass_near[self.pos]:
+            closest_food_dist, _ = nearest_occupied(grid.grass_count, xs, ys, x, y)
+        
             # Update food proximity (convert to 0-6 scale, 0 = here, 6 = not visible)
-            if closest_food_dist != float('inf'):
+            if closest_food_dist >= 0:
                 inputs["food_proximity"] = min(6, closest_food_dist)
-            
-            # Use predator info if provided, otherwise check for predators
-            if predator_info and predator_info["detected"]:
+        
+        # Use predator info if provided, otherwise check for predators.
+        # This step's scan covers the same radius, so when it found
+        # nothing there is nothing left to look for.
+        if predator_info is not None:
+            if predator_info["detected"]:
                 inputs["predator_proximity"] = min(6, predator_info["closest_dist"])
-            else:
-                # Check for predators in the immediate area
-                closest_predator_dist = float('inf')
-                for cell in neighborhood:
-                    cell_content = self.model.grid.get_cell_list_contents([cell])
-                    for agent in cell_content:
-                        if hasattr(agent, 'is_predator') and agent.is_predator:
-                            dist = self._calculate_distance(self.pos, cell)
-                            closest_predator_dist = min(closest_predator_dist, dist)
-                
-                # Update predator proximity (convert to 0-6 scale, 0 = here, 6 = not visible)
-                if closest_predator_dist != float('inf'):
-                    inputs["predator_proximity"] = min(6, closest_predator_dist)
-                
-        except Exception as e:
-            print(f"Herbivore input gathering error: {e}")
+        elif grid.pred_near[self.pos]:
+            # Check for predators in the immediate area
+            closest_predator_dist, _ = nearest_occupied(grid.pred_count, xs, ys, x, y)
+            
+            # Update predator proximity (convert to 0-6 scale, 0 = here, 6 = not visible)
+            if closest_predator_dist >= 0:
+                inputs["predator_proximity"] = min(6, closest_predator_dist)
             
         return inputs
     
-    def _calculate_distance(self, pos1, pos2):
-        """Calculate Manhattan distance between two positions"""
-        return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
-    
-    def _execute_decision(self, decision):
-        """Execute the decision from the fuzzy brain"""
+    def _execute_decision(self, decision, predator_info=None):
+        """Execute the decision from the fuzzy brain, reusing this step's predator scan"""
         # Handle movement decision
         movement = decision.get("movement", "wander")
         
@@ -194,15 +158,15 @@ class Herbivore(Animal):
                 self.energy = max(0, self.energy - emergency_cost)
                 
                 # Perform sprint escape (enhanced fleeing)
-                self._sprint_from_predators()
+                self._sprint_from_predators(predator_info)
                 
                 # Set cooldown
                 self.sprint_cooldown = 5  # Increased from 3 to 5 turns
             else:
                 # Can't sprint, do regular flee
-                self._evade_predators()
+                self._evade_predators(predator_info)
         elif movement == "flee":
-            self._evade_predators()
+            self._evade_predators(predator_info)
         elif movement == "seek_food":
             self._find_food()
         elif movement == "seek_partner":
@@ -219,303 +183,201 @@ class Herbivore(Animal):
     
     def eat_grass(self):
         """Look for grass in the current cell and eat it if found"""
-        if not self._check_position():
-            return
-            
-        try:
-            cell_content = self.model.grid.get_cell_list_contents([self.pos])
-            for agent in cell_content:
-                if hasattr(agent, 'is_grass') and agent.is_grass:
-                    # Eat the grass
-                    self.energy += GRASS_ENERGY_VALUE
-                    self.energy = min(self.energy, self.max_energy)
-                    self.model.grid.remove_agent(agent)
-                    self.steps_without_food = 0  # Reset hunger counter
-                    break
-        except Exception as e:
-            print(f"Eat error: {e}")
+        # Eat the grass, if there is any here
+        if self.model.grid.remove_grass(self.pos):
+            self.energy += GRASS_ENERGY_VALUE
+            self.energy = min(self.energy, self.max_energy)
+            self.steps_without_food = 0  # Reset hunger counter
     
     def _find_food(self):
         """Move toward the closest grass"""
-        if not self._check_position():
-            return
-            
-        try:
-            # Get nearby cells
-            neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=False)
-                
-            # Look for cells with grass
-            food_cells = []
-            for cell in neighborhood:
-                cell_content = self.model.grid.get_cell_list_contents([cell])
-                if any(hasattr(agent, 'is_grass') for agent in cell_content):
-                    food_cells.append(cell)
-            
-            # If food found, move toward it
-            if food_cells:
-                target_cell = random.choice(food_cells)
-                self.move_to(target_cell)
-            else:
-                # No food in immediate vicinity, random move
-                self.random_move()
-                
-        except Exception as e:
-            print(f"Find food error: {e}")
+        # Look for nearby cells with grass, unless there is none within sight
+        food_cells = []
+        grid = self.model.grid
+        if grid.grass_near[self.pos]:
+            food_cells = [cell for cell, _ in grid.occupied_cells(
+                grid.grass_count, self.pos, 1)]
+        
+        # If food found, move toward it
+        if food_cells:
+            target_cell = random.choice(food_cells)
+            self.move_to(target_cell)
+        else:
+            # No food in immediate vicinity, random move
+            self.random_move()
     
-    def _evade_predators(self):
+    def _evade_predators(self, predator_info=None):
         """Move away from nearby predators with improved but not too effective escape logic"""
-        if not self._check_position():
-            return
-            
-        try:
-            # Get predator information with narrower scan
+        # Get predator information with narrower scan, unless already scanned this step
+        if predator_info is None:
             predator_info = self._scan_for_predators(radius=3)  # Reduced from 5 to 3
+        
+        if not predator_info["detected"]:
+            # No predators detected, move randomly
+            self.random_move()
+            return
             
-            if not predator_info["detected"]:
-                # No predators detected, move randomly
-                self.random_move()
-                return
-                
-            # 25% chance to make a suboptimal escape decision when not in immediate danger
-            if predator_info["closest_dist"] >= 3 and random.random() < 0.25:
-                self.random_move()
-                return
-                
-            # Get all nearby cells for potential movement
-            neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=False)  # Reduced from radius 2 to immediate neighbors
-                
-            # Evaluate safety of each cell
-            safe_cells = []
-            cell_scores = {}
-            
-            for cell in neighborhood:
-                # Skip cells that are occupied by other agents that would block movement
-                cell_content = self.model.grid.get_cell_list_contents([cell])
-                if any(hasattr(agent, 'blocks_movement') for agent in cell_content):
-                    continue
-                    
-                # Calculate score for this cell (higher is better)
-                score = 0
-                
-                # Factor 1: Distance from predators (most important)
-                min_pred_dist = float('inf')
-                for pred_cell, pred_dist in predator_info["predator_cells"]:
-                    dist_to_pred = self._calculate_distance(cell, pred_cell)
-                    min_pred_dist = min(min_pred_dist, dist_to_pred)
-                
-                if min_pred_dist != float('inf'):
-                    # Higher score for cells further from predators
-                    score += min_pred_dist * 4  # Reduced from 5 to 4
-                
-                # Factor 2: Prefer cells that move away from current position relative to predator
-                # (i.e., if predator is south, prefer north cells)
-                if len(predator_info["predator_cells"]) > 0:
-                    # Find the closest predator
-                    closest_pred = min(predator_info["predator_cells"], key=lambda x: x[1])
-                    closest_pred_pos = closest_pred[0]
-                    
-                    # Calculate vector from predator to current position
-                    away_vector = (self.pos[0] - closest_pred_pos[0], self.pos[1] - closest_pred_pos[1])
-                    
-                    # Calculate vector from current position to candidate cell
-                    move_vector = (cell[0] - self.pos[0], cell[1] - self.pos[1])
-                    
-                    # Dot product to see if we're moving in similar direction to "away vector"
-                    dot_product = away_vector[0] * move_vector[0] + away_vector[1] * move_vector[1]
-                    score += max(0, dot_product * 2)  # Reduced from 3 to 2
-                
-                # Factor 3: Prefer cells with food
-                has_food = False
-                for agent in cell_content:
-                    if hasattr(agent, 'is_grass') and agent.is_grass:
-                        has_food = True
-                        break
-                
-                if has_food:
-                    score += 3  # Increased from 2 to 3 - more emphasis on food
-                
-                # Store the score for this cell
-                cell_scores[cell] = score
-                safe_cells.append(cell)
-            
-            # Choose cell with best score if we have options
-            if safe_cells:
-                # Sort by score (highest first)
-                best_cells = sorted(safe_cells, key=lambda c: cell_scores[c], reverse=True)
-                
-                # Take the best cell or one of the top cells with more randomness
-                if len(best_cells) > 2:
-                    # Choose from top cells with more randomness
-                    # 60% chance to pick best cell, 40% chance for a random choice from top 3
-                    if random.random() < 0.6:
-                        target_cell = best_cells[0]
-                    else:
-                        target_cell = random.choice(best_cells[:3])
-                else:
-                    # Take the best cell if we don't have many options
-                    target_cell = best_cells[0]
-                
-                self.move_to(target_cell)
-            else:
-                # No safe cells found, just try to move randomly
-                self.random_move()
-                
-        except Exception as e:
-            print(f"Evade predators error: {e}")
-    
-    def _sprint_from_predators(self):
-        """Emergency escape with limited movement range"""
-        if not self._check_position():
+        # 25% chance to make a suboptimal escape decision when not in immediate danger
+        if predator_info["closest_dist"] >= 3 and random.random() < 0.25:
+            self.random_move()
             return
             
-        try:
-            # Get predator information
-            predator_info = self._scan_for_predators(radius=3)  # Reduced from 5 to 3
+        # Get all nearby cells for potential movement
+        grid = self.model.grid
+        neighborhood = grid.get_neighborhood(
+            self.pos, moore=True, include_center=False)  # Reduced from radius 2 to immediate neighbors
             
-            if not predator_info["detected"]:
-                # No predators detected, just do regular movement
-                self.random_move()
-                return
+        # Calculate vector from the closest predator to current position
+        closest_pred_pos = predator_info["closest_cell"]
+        away_vector = (self.pos[0] - closest_pred_pos[0], self.pos[1] - closest_pred_pos[1])
+
+        # Several predators can share a cell; each cell only needs measuring once
+        pred_cells = list(dict.fromkeys(cell for cell, _ in predator_info["predator_cells"]))
+
+        # Evaluate safety of each cell
+        safe_cells = []
+        cell_scores = []  # Parallel to safe_cells
+        
+        for cell in neighborhood:
+            # Skip cells that are occupied by other agents that would block movement
+            if grid.is_blocked(cell):
+                continue
                 
-            # Find the closest predator
-            closest_pred = min(predator_info["predator_cells"], key=lambda x: x[1])
-            closest_pred_pos = closest_pred[0]
+            # Calculate score for this cell (higher is better)
+            score = 0
             
-            # Calculate the direction vector away from predator
-            away_vector = (self.pos[0] - closest_pred_pos[0], self.pos[1] - closest_pred_pos[1])
+            # Factor 1: Distance from predators (most important)
+            cx, cy = cell
+            min_pred_dist = min(abs(cx - px) + abs(cy - py) for px, py in pred_cells)
             
-            # Normalize and scale the vector (for longer movement)
-            magnitude = math.sqrt(away_vector[0]**2 + away_vector[1]**2)
-            if magnitude > 0:
-                away_vector = (away_vector[0]/magnitude, away_vector[1]/magnitude)
+            # Higher score for cells further from predators
+            score += min_pred_dist * 4  # Reduced from 5 to 4
             
-            # Calculate target position (only 1 cell away in the direction away from predator)
-            # When predator is very close (dist <= 2), try to move 2 cells
-            move_dist = 1
-            if closest_pred[1] <= 2:  # Only get 2-cell sprint when predator is very close
-                move_dist = 2
-                
-            # Using integer positions and rounding
-            target_x = self.pos[0] + round(away_vector[0] * move_dist)
-            target_y = self.pos[1] + round(away_vector[1] * move_dist)
-            
-            # Ensure target is within grid bounds
-            target_x = max(0, min(self.model.grid.width - 1, target_x))
-            target_y = max(0, min(self.model.grid.height - 1, target_y))
+            # Factor 2: Prefer cells that move away from current position relative to predator
+            # (i.e., if predator is south, prefer north cells)
+            # Calculate vector from current position to candidate cell
+            move_vector = (cx - self.pos[0], cy - self.pos[1])
             
-            target_pos = (target_x, target_y)
+            # Dot product to see if we're moving in similar direction to "away vector"
+            dot_product = away_vector[0] * move_vector[0] + away_vector[1] * move_vector[1]
+            score += max(0, dot_product * 2)  # Reduced from 3 to 2
             
-            # 30% chance to fail the longer 2-cell sprint
-            if move_dist == 2 and random.random() < 0.3:
-                # Fall back to 1-cell move in the right direction
-                cell_x = self.pos[0] + round(away_vector[0])
-                cell_y = self.pos[1] + round(away_vector[1])
-                cell_x = max(0, min(self.model.grid.width - 1, cell_x))
-                cell_y = max(0, min(self.model.grid.height - 1, cell_y))
-                target_pos = (cell_x, cell_y)
+            # Factor 3: Prefer cells with food
+            if grid.grass_count[cell]:
+                score += 3  # Increased from 2 to 3 - more emphasis on food
             
-            # Get a path of cells to move through
-            path = self._get_path_to(target_pos)
-            
-            if path and len(path) > 0:
-                # Move along the path
-                move_to = path[0]
-                if len(path) > 1 and move_dist == 2:
-                    # Try to move 2 cells for sprint
-                    second_cell = path[1]
-                    # Check if second cell is empty or has only grass
-                    cell_content = self.model.grid.get_cell_list_contents([second_cell])
-                    if not any(hasattr(agent, 'blocks_movement') for agent in cell_content):
-                        move_to = second_cell
-                
-                self.move_to(move_to)
+            # Store the score for this cell
+            cell_scores.append(score)
+            safe_cells.append(cell)
+        
+        # Choose cell with best score if we have options
+        if safe_cells:
+            # Top 3 cells by score (highest first, ties in neighborhood order)
+            best = heapq.nlargest(3, range(len(safe_cells)), key=cell_scores.__getitem__)
+            best_cells = [safe_cells[i] for i in best]
+            
+            # Take the best cell or one of the top cells with more randomness
+            if len(best_cells) > 2:
+                # Choose from top cells with more randomness
+                # 60% chance to pick best cell, 40% chance for a random choice from top 3
+                if random.random() < 0.6:
+                    target_cell = best_cells[0]
+                else:
+                    target_cell = random.choice(best_cells)
             else:
-                # Fall back to evade if no path
-                self._evade_predators()
-                
-        except Exception as e:
-            print(f"Sprint error: {e}")
-    
-    def _get_path_to(self, target_pos):
-        """Generate a path from current position to target"""
-        if not self._check_position():
-            return []
+                # Take the best cell if we don't have many options
+                target_cell = best_cells[0]
             
-        # Simple path generation - get cells in a line toward target
-        path = []
-        current = self.pos
+            self.move_to(target_cell)
+        else:
+            # No safe cells found, just try to move randomly
+            self.random_move()
+    
+    def _sprint_from_predators(self, predator_info=None):
+        """Emergency escape with limited movement range"""
+        # Get predator information, unless already scanned this step
+        if predator_info is None:
+            predator_info = self._scan_for_predators(radius=3)  # Reduced from 5 to 3
         
-        # Get neighborhood in larger radius
-        neighborhood = self.model.grid.get_neighborhood(
-            self.pos, moore=True, include_center=False, radius=2)
-            
-        # Find cells that are progressively closer to target
-        while neighborhood:
-            # Find the cell closest to target
-            closest = min(neighborhood, key=lambda cell: self._calculate_distance(cell, target_pos))
-            
-            # Add to path and prepare for next iteration
-            path.append(closest)
-            
-            # If we've reached target or are getting farther, stop
-            if closest == target_pos or self._calculate_distance(closest, target_pos) >= self._calculate_distance(current, target_pos):
-                break
-                
-            # Update for next step
-            current = closest
-            neighborhood = self.model.grid.get_neighborhood(
-                current, moore=True, include_center=False)
+        if not predator_info["detected"]:
+            # No predators detected, just do regular movement
+            self.random_move()
+            return
             
-        return path
+        # Closest predator, as found by the scan
+        closest_pred_pos = predator_info["closest_cell"]
+        
+        # Calculate the direction vector away from predator
+        away_vector = (self.pos[0] - closest_pred_pos[0], self.pos[1] - closest_pred_pos[1])
+        
+        # Calculate target position (only 1 cell away in the direction away from predator)
+        # When predator is very close (dist <= 2), try to move 2 cells
+        move_dist = 1
+        if predator_info["closest_dist"] <= 2:  # Only get 2-cell sprint when predator is very close
+            move_dist = 2
+            
+        # Using integer positions: the away vector scaled to move_dist cells, rounded
+        target_x = self.pos[0] + _rounded_share(away_vector[0], away_vector[1], move_dist)
+        target_y = self.pos[1] + _rounded_share(away_vector[1], away_vector[0], move_dist)
+        
+        # Ensure target is within grid bounds
+        last_x = self.model.grid.width - 1
+        last_y = self.model.grid.height - 1
+        target_x = 0 if target_x < 0 else (last_x if target_x > last_x else target_x)
+        target_y = 0 if target_y < 0 else (last_y if target_y > last_y else target_y)
+        
+        target_pos = (target_x, target_y)
+        
+        # 30% chance to fail the longer 2-cell sprint
+        if move_dist == 2 and random.random() < 0.3:
+            # Fall back to 1-cell move in the right direction
+            cell_x = self.pos[0] + _rounded_share(away_vector[0], away_vector[1], 1)
+            cell_y = self.pos[1] + _rounded_share(away_vector[1], away_vector[0], 1)
+            cell_x = 0 if cell_x < 0 else (last_x if cell_x > last_x else cell_x)
+            cell_y = 0 if cell_y < 0 else (last_y if cell_y > last_y else cell_y)
+            target_pos = (cell_x, cell_y)
+        
+        # The target is at most two cells away, so head straight for it.
+        # Pinned against the grid's edge the target can be our own cell;
+        # then step to the adjacent cell closest to it instead.
+        if target_pos == self.pos:
+            x, y = self.pos
+            target_pos = min(self.get_neighbors(),
+                             key=lambda cell: abs(cell[0] - x) + abs(cell[1] - y))
+        
+        self.move_to(target_pos)
     
     def _seek_partner(self):
         """Move toward other herbivores for potential reproduction"""
-        if not self._check_position():
-            return
-            
-        try:
-            # Get nearby cells within a larger radius
-            neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=False, radius=3)
-                
-            # Look for cells with other herbivores
-            partner_cells = []
-            for cell in neighborhood:
-                cell_content = self.model.grid.get_cell_list_contents([cell])
-                herbivores_in_cell = [agent for agent in cell_content 
-                                    if hasattr(agent, 'is_herbivore') and agent.is_herbivore and agent != self]
-                if herbivores_in_cell:
-                    # Add with priority proportional to number of potential partners
-                    partner_cells.extend([cell] * len(herbivores_in_cell))
-            
-            # If potential partners found, move toward one
-            if partner_cells:
-                # Choose weighted by concentration of potential partners
-                target_cell = random.choice(partner_cells)
-                self.move_to(target_cell)
-            else:
-                # No potential partners in immediate vicinity, random move
-                self.random_move()
-                
-        except Exception as e:
-            print(f"Seek partner error: {e}")
+        # Look for nearby cells with other herbivores, within a larger radius
+        # (our own cell is not part of the view, so we never count ourselves)
+        grid = self.model.grid
+        partner_cells = grid.occupied_cells(grid.herb_count, self.pos, 3)
+        
+        # If potential partners found, move toward one
+        if partner_cells:
+            # Choose weighted by concentration of potential partners:
+            # pick one of the partners, then walk to the cell holding it
+            pick = random.randrange(sum(count for _, count in partner_cells))
+            for target_cell, count in partner_cells:
+                if pick < count:
+                    break
+                pick -= count
+            self.move_to(target_cell)
+        else:
+            # No potential partners in immediate vicinity, random move
+            self.random_move()
     
     def reproduce(self):
         """Create a new herbivore and place it nearby"""
-        try:
-            # Calculate energy distribution
-            original_energy = self.energy
-            self.energy *= HERBIVORE_BREEDING_ENERGY_COST  # Parent keeps 50% energy
-            offspring_energy = original_energy * HERBIVORE_BREEDING_ENERGY_COST * HERBIVORE_OFFSPRING_ENERGY_FACTOR
-            
-            # Create a new herbivore
-            baby = Herbivore(self.model, energy=offspring_energy)
-            
-            # Find place for baby and place it
-            self.place_offspring(baby)
-            
-        except Exception as e:
-            print(f"Reproduction error: {e}")
+        # Calculate energy distribution
+        original_energy = self.energy
+        self.energy *= HERBIVORE_BREEDING_ENERGY_COST  # Parent keeps 50% energy
+        offspring_energy = original_energy * HERBIVORE_BREEDING_ENERGY_COST * HERBIVORE_OFFSPRING_ENERGY_FACTOR
+        
+        # Create a new herbivore
+        baby = Herbivore(self.model, energy=offspring_energy)
+        
+        # Find place for baby and place it
+        self.place_offspring(baby)
 
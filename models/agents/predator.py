@@ -1,5 +1,7 @@
 import random
 from models.agents.base_agent import Animal
+from models.agents.herbivore import Herbivore
+from models.kernels import nearest_occupied
 from models.fuzzy_brain import PredatorBrain
 from models.config import (
     PREDATOR_INIT_ENERGY,
@@ -13,45 +15,38 @@ from models.config import (
     PREDATOR_PREY_ENERGY_VALUE
 )
 
-# Import for type checking only, not at runtime to avoid circular imports
-from typing import TYPE_CHECKING
-if TYPE_CHECKING:
-    from models.agents.herbivore import Herbivore
 
 class Predator(Animal):
     """Predator agent that hunts herbivores and reproduces"""
     
+    is_predator = True
+    brain = PredatorBrain()  # Fuzzy brain, stateless and shared by all predators
+    
     def __init__(self, model, energy=PREDATOR_INIT_ENERGY, max_energy=PREDATOR_MAX_ENERGY):
         super().__init__(model, energy, max_energy)
-        self.is_predator = True
         self.breeding_cooldown = 0
-        self.brain = PredatorBrain()  # Initialize fuzzy brain
     
     def step(self):
         """Perform one step of predator behavior"""
-        try:
-            # Update breeding cooldown
-            if self.breeding_cooldown > 0:
-                self.breeding_cooldown -= 1
-            
-            # Increment hunger counter
-            self.steps_without_food += 1
-            
-            # Apply hunger effects with predator's hunger levels
-            if not self.reduce_energy(PREDATOR_HUNGER_LEVELS):
-                return  # Animal died of starvation
-            
-            # Get environmental inputs for the brain
-            inputs = self._gather_inputs()
-            
-            # Get decision from fuzzy brain
-            decision = self.brain.decide(inputs)
-            
-            # Execute the decision
-            self._execute_decision(decision)
-                
-        except Exception as e:
-            print(f"Predator step error: {e}")
+        # Update breeding cooldown
+        if self.breeding_cooldown > 0:
+            self.breeding_cooldown -= 1
+        
+        # Increment hunger counter
+        self.steps_without_food += 1
+        
+        # Apply hunger effects with predator's hunger levels
+        if not self.reduce_energy(PREDATOR_HUNGER_LEVELS):
+            return  # Animal died of starvation
+        
+        # Get environmental inputs for the brain
+        inputs = self._gather_inputs()
+        
+        # Get decision from fuzzy brain
+        decision = self.brain.decide(inputs)
+        
+        # Execute the decision
+        self._execute_decision(decision)
     
     def _gather_inputs(self):
         """Gather environmental inputs for the fuzzy brain"""
@@ -62,42 +57,23 @@ class Predator(Animal):
             "prey_count": 0  # Default: no prey visible
         }
         
-        if not self._check_position():
-            return inputs
-            
-        try:
-            # Get surrounding cells
-            neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=False, radius=4)
-                
-            # Check for prey (herbivores)
-            closest_prey_dist = float('inf')
-            prey_count = 0
-            
-            for cell in neighborhood:
-                cell_content = self.model.grid.get_cell_list_contents([cell])
-                for agent in cell_content:
-                    if hasattr(agent, 'is_herbivore') and agent.is_herbivore:
-                        prey_count += 1
-                        dist = self._calculate_distance(self.pos, cell)
-                        closest_prey_dist = min(closest_prey_dist, dist)
+        # Get surrounding cells
+        grid = self.model.grid
+        xs, ys = grid.window_axes(self.pos, 4)
             
-            # Update prey proximity (convert to 0-6 scale, 0 = here, 6 = not visible)
-            if closest_prey_dist != float('inf'):
-                inputs["prey_proximity"] = min(6, closest_prey_dist)
-            
-            # Update prey count
-            inputs["prey_count"] = prey_count
-                
-        except Exception as e:
-            print(f"Predator input gathering error: {e}")
+        # Check for prey (herbivores) using the grid's per-cell counts
+        closest_prey_dist, prey_count = nearest_occupied(
+            grid.herb_count, xs, ys, self.pos[0], self.pos[1])
+        
+        # Update prey proximity (convert to 0-6 scale, 0 = here, 6 = not visible)
+        if closest_prey_dist >= 0:
+            inputs["prey_proximity"] = min(6, closest_prey_dist)
+        
+        # Update prey count
+        inputs["prey_count"] = prey_count
             
         return inputs
     
-    def _calculate_distance(self, pos1, pos2):
-        """Calculate Manhattan distance between two positions"""
-        return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
-    
     def _execute_decision(self, decision):
         """Execute the decision from the fuzzy brain"""
         # Handle hunting decision
@@ -124,155 +100,94 @@ class Predator(Animal):
     
     def hunt(self):
         """Try to find and eat herbivores in the current cell"""
-        if not self._check_position():
-            return False
-            
-        try:
-            # Check current cell for herbivores
-            cell_content = self.model.grid.get_cell_list_contents([self.pos])
-            for agent in cell_content:
-                if hasattr(agent, 'is_herbivore') and agent.is_herbivore:
-                    # Eat the herbivore
-                    self.energy += PREDATOR_PREY_ENERGY_VALUE
-                    self.energy = min(self.energy, self.max_energy)
-                    self.steps_without_food = 0  # Reset hunger
-                    
-                    # Remove the eaten herbivore
-                    self.model.grid.remove_agent(agent)
-                    return True
-            
-            # No prey found in current cell
-            return False
-        except Exception as e:
-            print(f"Hunt error: {e}")
+        # Check current cell for herbivores
+        grid = self.model.grid
+        if not grid.herb_count[self.pos]:
             return False
+
+        for agent in grid[self.pos]:
+            if type(agent) is Herbivore:
+                # Eat the herbivore
+                self.energy += PREDATOR_PREY_ENERGY_VALUE
+                self.energy = min(self.energy, self.max_energy)
+                self.steps_without_food = 0  # Reset hunger
+                
+                # Remove the eaten herbivore
+                agent.die()
+                return True
+        
+        # No prey found in current cell
+        return False
     
     def _chase_prey(self):
         """Aggressively move toward nearest prey"""
-        if not self._check_position():
-            return
-            
-        try:
-            # Get nearby cells with larger radius for chasing
-            neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=False, radius=3)
-                
-            # Look for cells with prey
-            prey_cells = []
-            prey_distances = {}
-            
-            for cell in neighborhood:
-                cell_content = self.model.grid.get_cell_list_contents([cell])
-                for agent in cell_content:
-                    if hasattr(agent, 'is_herbivore') and agent.is_herbivore:
-                        dist = self._calculate_distance(self.pos, cell)
-                        prey_cells.append(cell)
-                        prey_distances[cell] = dist
-                        break  # Only need one herbivore per cell
-            
-            # If prey spotted, move toward the closest one
-            if prey_cells:
-                # Sort by distance
-                closest_cells = sorted(prey_cells, key=lambda c: prey_distances[c])
-                
-                if closest_cells:
-                    # Move to the closest prey cell or its neighbor
-                    target_cell = closest_cells[0]
-                    
-                    # If we can move directly to the prey cell
-                    if self._calculate_distance(self.pos, target_cell) == 1:
-                        self.move_to(target_cell)
-                    else:
-                        # Otherwise, find the neighboring cell that brings us closer
-                        immediate_neighbors = self.model.grid.get_neighborhood(
-                            self.pos, moore=True, include_center=False)
-                        
-                        best_cell = None
-                        best_distance = float('inf')
-                        
-                        for neighbor in immediate_neighbors:
-                            dist_to_prey = self._calculate_distance(neighbor, target_cell)
-                            if dist_to_prey < best_distance:
-                                best_distance = dist_to_prey
-                                best_cell = neighbor
-                        
-                        if best_cell:
-                            self.move_to(best_cell)
-                        else:
-                            self.random_move()
-                else:
-                    self.random_move()
+        # Look for cells with prey, with larger radius for chasing
+        grid = self.model.grid
+        x, y = self.pos
+        closest_cell = None
+        closest_dist = float('inf')
+        for cell, _ in grid.occupied_cells(grid.herb_count, self.pos, 3):
+            dist = abs(cell[0] - x) + abs(cell[1] - y)
+            if dist < closest_dist:
+                closest_dist = dist
+                closest_cell = cell
+        
+        # If prey spotted, move toward the closest one
+        if closest_cell is not None:
+            # Move to the closest prey cell or its neighbor
+            target_cell = closest_cell
+            
+            # If we can move directly to the prey cell
+            if closest_dist == 1:
+                self.move_to(target_cell)
             else:
-                # No prey spotted, random movement
-                self.random_move()
-                
-        except Exception as e:
-            print(f"Chase prey error: {e}")
+                # Otherwise, find the neighboring cell that brings us closer
+                self._step_toward(target_cell)
+        else:
+            # No prey spotted, random movement
+            self.random_move()
+    
+    def _step_toward(self, target_cell):
+        """Move to the neighboring cell closest to the target (the first one found, on ties)"""
+        neighbors = self.get_neighbors()
+        if not neighbors:
+            self.random_move()
+            return
+        tx, ty = target_cell
+        self.move_to(min(neighbors, key=lambda cell: abs(cell[0] - tx) + abs(cell[1] - ty)))
     
     def _stalk_prey(self):
         """Stealthily move toward prey"""
-        if not self._check_position():
-            return
-            
-        try:
-            # Similar to chase but with more careful movement
-            neighborhood = self.model.grid.get_neighborhood(
-                self.pos, moore=True, include_center=False, radius=2)
-                
-            # Look for cells with prey
-            prey_cells = []
-            for cell in neighborhood:
-                cell_content = self.model.grid.get_cell_list_contents([cell])
-                if any(hasattr(agent, 'is_herbivore') and agent.is_herbivore for agent in cell_content):
-                    prey_cells.append(cell)
-            
-            # If prey spotted, move toward it cautiously
-            if prey_cells:
-                target_cell = random.choice(prey_cells)
-                
-                # Get immediate neighbors
-                immediate_neighbors = self.model.grid.get_neighborhood(
-                    self.pos, moore=True, include_center=False)
-                
-                # Find neighbor that brings us closer to prey
-                best_cell = None
-                best_distance = float('inf')
-                
-                for neighbor in immediate_neighbors:
-                    dist_to_prey = self._calculate_distance(neighbor, target_cell)
-                    if dist_to_prey < best_distance:
-                        best_distance = dist_to_prey
-                        best_cell = neighbor
-                
-                if best_cell:
-                    self.move_to(best_cell)
-                else:
-                    self.random_move()
-            else:
-                # No prey spotted, random movement
-                self.random_move()
-                
-        except Exception as e:
-            print(f"Stalk prey error: {e}")
+        # Similar to chase but with more careful movement
+        # Look for cells with prey
+        grid = self.model.grid
+        prey_cells = [cell for cell, _ in grid.occupied_cells(
+            grid.herb_count, self.pos, 2)]
+        
+        # If prey spotted, move toward it cautiously
+        if prey_cells:
+            target_cell = random.choice(prey_cells)
+            
+            # Move to the neighbor that brings us closer to prey
+            self._step_toward(target_cell)
+        else:
+            # No prey spotted, random movement
+            self.random_move()
     
     def reproduce(self):
         """Create a new predator with breeding cooldown"""
-        try:
-            # Calculate energy distribution
-            original_energy = self.energy
-            self.energy *= PREDATOR_BREEDING_ENERGY_COST  # Parent keeps 50% energy
-            
-            # Offspring energy calculation 
-            offspring_energy = original_energy * PREDATOR_OFFSPRING_ENERGY_FACTOR
-            
-            # Reset breeding cooldown
-            self.breeding_cooldown = PREDATOR_BREEDING_COOLDOWN
-            
-            # Create baby predator
-            baby = Predator(self.model, energy=offspring_energy)
-            
-            # Find place for baby and place it
-            self.place_offspring(baby)
-            
-        except Exception as e:
-            print(f"Reproduction error: {e}") 
\ No newline at end of file
+        # Calculate energy distribution
+        original_energy = self.energy
+        self.energy *= PREDATOR_BREEDING_ENERGY_COST  # Parent keeps 50% energy
+        
+        # Offspring energy calculation 
+        offspring_energy = original_energy * PREDATOR_OFFSPRING_ENERGY_FACTOR
+        
+        # Reset breeding cooldown
+        self.breeding_cooldown = PREDATOR_BREEDING_COOLDOWN
+        
+        # Create baby predator
+        baby = Predator(self.model, energy=offspring_energy)
+        
+        # Find place for baby and place it
+        self.place_offspring(baby)
\ No newline at end of file
@@ -8,19 +8,36 @@ than simple if-else rules.
 
 import random
 import numpy as np
-from collections import defaultdict
+
+from models.kernels import rule_strengths
+
+# Number of decisions a brain remembers before its cache is cleared
+DECISION_CACHE_SIZE = 4096
+
+
+def _add_energy_sets(energy):
+    """Add the low/medium/high sets of the (0-1 normalized) energy level both species share"""
+    energy.add_set("low", lambda x: max(0, min(1, (0.3 - x) / 0.3)) if x < 0.3 else 0)
+    energy.add_set("medium", lambda x: max(0, min((x - 0.1) / 0.3, (0.7 - x) / 0.3)) if 0.1 <= x <= 0.7 else 0)
+    energy.add_set("high", lambda x: max(0, min(1, (x - 0.5) / 0.5)) if x > 0.5 else 0)
+
 
 class FuzzyVariable:
     """
     Represents a fuzzy variable with multiple fuzzy sets
     """
-    def __init__(self, name, sets=None):
+    __slots__ = ("name", "sets", "on_change")
+
+    def __init__(self, name, sets=None, on_change=None):
         self.name = name
         self.sets = sets or {}  # Dictionary of set_name: membership_function
+        self.on_change = on_change  # Called after a set is added
         
     def add_set(self, name, membership_function):
         """Add a fuzzy set with its membership function"""
         self.sets[name] = membership_function
+        if self.on_change is not None:
+            self.on_change()
         
     def fuzzify(self, value):
         """
@@ -38,6 +55,8 @@ class FuzzyRule:
     Represents a fuzzy rule like:
     IF energy IS low AND prey IS near THEN move IS fast
     """
+    __slots__ = ("antecedents", "consequent", "weight", "_antecedent_pairs")
+
     def __init__(self, antecedents, consequent, weight=1.0):
         """
         Initialize a fuzzy rule
@@ -50,25 +69,27 @@ class FuzzyRule:
         self.antecedents = antecedents
         self.consequent = consequent
         self.weight = weight
+        self._antecedent_pairs = tuple(antecedents.items())
         
     def evaluate(self, fuzzified_inputs):
         """
         Evaluate the rule given fuzzified inputs
         Returns the firing strength of the rule
         """
-        # Get all membership degrees for antecedents
-        degrees = []
-        for var_name, set_name in self.antecedents.items():
-            if var_name in fuzzified_inputs and set_name in fuzzified_inputs[var_name]:
-                degrees.append(fuzzified_inputs[var_name][set_name])
-            else:
+        # Use the minimum of the antecedents' degrees for AND (Mamdani method)
+        strength = None
+        for var_name, set_name in self._antecedent_pairs:
+            memberships = fuzzified_inputs.get(var_name)
+            if memberships is None or set_name not in memberships:
                 # If any antecedent is not satisfied, the rule doesn't fire
                 return 0.0
+            degree = memberships[set_name]
+            if strength is None or degree < strength:
+                strength = degree
                 
-        # Use the minimum for AND operation (Mamdani method)
-        if degrees:
-            return min(degrees) * self.weight
-        return 0.0
+        if strength is None:
+            return 0.0
+        return strength * self.weight
 
 
 class FuzzyBrain:
@@ -79,13 +100,24 @@ class FuzzyBrain:
         self.input_variables = {}
         self.output_variables = {}
         self.rules = []
+        self._decision_cache = {}
+        self._rule_matrix = None
         
     def add_input_variable(self, name, sets=None):
         """Add an input variable to the fuzzy system"""
-        var = FuzzyVariable(name, sets)
+        self._decision_cache.clear()
+        self._rule_matrix = None
+        var = FuzzyVariable(name, sets, on_change=self._input_sets_changed)
         self.input_variables[name] = var
         return var
         
+    def _input_sets_changed(self):
+        """Called when a set is added to an input variable"""
+        # The new set needs a slot in the compiled rule matrix, and
+        # decisions made without it are stale
+        self._decision_cache.clear()
+        self._rule_matrix = None
+        
     def add_output_variable(self, name, sets=None):
         """Add an output variable to the fuzzy system"""
         var = FuzzyVariable(name, sets)
@@ -94,6 +126,8 @@ class FuzzyBrain:
         
     def add_rule(self, antecedents, consequent, weight=1.0):
         """Add a fuzzy rule to the system"""
+        self._decision_cache.clear()
+        self._rule_matrix = None
         rule = FuzzyRule(antecedents, consequent, weight)
         self.rules.append(rule)
         
@@ -113,21 +147,59 @@ class FuzzyBrain:
                 fuzzified[var_name] = self.input_variables[var_name].fuzzify(value)
         return fuzzified
         
+    def _compile_rules(self):
+        """
+        Lower the rule base to arrays for rule_strengths
+
+        Every input set gets a slot in one flat vector of membership
+        degrees, and every rule becomes a row of its antecedents' slots.
+        Antecedents naming an unknown variable or set point at an extra
+        slot that always holds 0, so those rules never fire, just like
+        in FuzzyRule.evaluate. Compiled on first use after the variables
+        or rules change, along with each rule's (variable, set) consequent.
+        """
+        slots = {}
+        for var_name, variable in self.input_variables.items():
+            for set_name in variable.sets:
+                slots[(var_name, set_name)] = len(slots)
+        width = max([len(rule._antecedent_pairs) for rule in self.rules] + [1])
+        rule_slots = np.full((len(self.rules), width), -1, dtype=np.int64)
+        for i, rule in enumerate(self.rules):
+            for j, antecedent in enumerate(rule._antecedent_pairs):
+                rule_slots[i, j] = slots.get(antecedent, len(slots))
+        weights = np.array([rule.weight for rule in self.rules], dtype=np.float64)
+        consequents = [rule.consequent[:2] for rule in self.rules]
+        self._rule_matrix = (slots, rule_slots, weights, consequents)
+        return self._rule_matrix
+        
     def infer(self, fuzzified_inputs):
         """
         Apply fuzzy inference to get output values
         """
-        # Dictionary to hold firing strengths for each output variable and set
-        output_strengths = defaultdict(lambda: defaultdict(float))
-        
-        # Evaluate all rules
-        for rule in self.rules:
-            firing_strength = rule.evaluate(fuzzified_inputs)
+        slots, rule_slots, weights, consequents = self._rule_matrix or self._compile_rules()
+        
+        # Lay the membership degrees out in their slots
+        degrees = [0.0] * (len(slots) + 1)
+        for var_name, memberships in fuzzified_inputs.items():
+            for set_name, degree in memberships.items():
+                slot = slots.get((var_name, set_name))
+                if slot is not None:
+                    degrees[slot] = degree
+        
+        # Dictionary to hold firing strengths for each output variable and set,
+        # in the order the sets first fire
+        output_strengths = {}
+        
+        # Evaluate all rules at once
+        strengths = rule_strengths(np.array(degrees, dtype=np.float64), rule_slots, weights)
+        for (output_var, output_set), firing_strength in zip(consequents, strengths.tolist()):
             if firing_strength > 0:
-                output_var, output_set, action = rule.consequent
+                set_strengths = output_strengths.get(output_var)
+                if set_strengths is None:
+                    set_strengths = output_strengths[output_var] = {}
                 # Use maximum for rules with same consequent
-                current = output_strengths[output_var][output_set]
-                output_strengths[output_var][output_set] = max(current, firing_strength)
+                if firing_strength > set_strengths.get(output_set, 0.0):
+                    set_strengths[output_set] = firing_strength
                 
         return output_strengths, self._get_actions(output_strengths)
     
@@ -141,10 +213,19 @@ class FuzzyBrain:
         """
         Make a decision based on input values
         Returns a dictionary of actions and their values
+
+        Decisions are deterministic, so they are remembered per exact set
+        of input values and repeated inputs skip the inference.
         """
-        fuzzified = self.fuzzify_inputs(input_values)
-        _, actions = self.infer(fuzzified)
-        return actions
+        key = tuple(input_values.items())
+        actions = self._decision_cache.get(key)
+        if actions is None:
+            fuzzified = self.fuzzify_inputs(input_values)
+            _, actions = self.infer(fuzzified)
+            if len(self._decision_cache) >= DECISION_CACHE_SIZE:
+                self._decision_cache.clear()
+            self._decision_cache[key] = actions
+        return dict(actions)
 
 
 class HerbivoreBrain(FuzzyBrain):
@@ -161,9 +242,7 @@ class HerbivoreBrain(FuzzyBrain):
         
         # Energy level
         energy = self.add_input_variable("energy")
-        energy.add_set("low", lambda x: max(0, min(1, (0.3 - x) / 0.3)) if x < 0.3 else 0)
-        energy.add_set("medium", lambda x: max(0, min((x - 0.1) / 0.3, (0.7 - x) / 0.3)) if 0.1 <= x <= 0.7 else 0)
-        energy.add_set("high", lambda x: max(0, min(1, (x - 0.5) / 0.5)) if x > 0.5 else 0)
+        _add_energy_sets(energy)
         energy.add_set("full", lambda x: max(0, min(1, (x - 0.85) / 0.15)) if x > 0.85 else 0)  # Added "full" state
         
         # Food proximity
@@ -323,25 +402,10 @@ class HerbivoreBrain(FuzzyBrain):
         actions = {}
         
         # Determine movement action
+        # Only sets that fired are listed, so the strongest one wins (the
+        # first of them on a tie) and "wander" is the default
         movement_options = output_strengths.get("movement", {})
-        max_strength = 0
-        best_movement = "wander"  # Default
-        
-        for move, strength in movement_options.items():
-            if strength > max_strength:
-                max_strength = strength
-                if move == "sprint":
-                    best_movement = "sprint"  # Emergency escape takes precedence
-                elif move == "flee":
-                    best_movement = "flee"
-                elif move == "seek_food":
-                    best_movement = "seek_food"
-                elif move == "seek_partner":
-                    best_movement = "seek_partner"
-                else:
-                    best_movement = "wander"
-                    
-        actions["movement"] = best_movement
+        actions["movement"] = max(movement_options, key=movement_options.get, default="wander")
         
         # Determine reproduction action - MODIFIED
         repro_options = output_strengths.get("reproduction", {})
@@ -371,9 +435,7 @@ class PredatorBrain(FuzzyBrain):
         
         # Energy level
         energy = self.add_input_variable("energy")
-        energy.add_set("low", lambda x: max(0, min(1, (0.3 - x) / 0.3)) if x < 0.3 else 0)
-        energy.add_set("medium", lambda x: max(0, min((x - 0.1) / 0.3, (0.7 - x) / 0.3)) if 0.1 <= x <= 0.7 else 0)
-        energy.add_set("high", lambda x: max(0, min(1, (x - 0.5) / 0.5)) if x > 0.5 else 0)
+        _add_energy_sets(energy)
         
         # Prey proximity - MODIFIED to increase perceived proximity
         prey = self.add_input_variable("prey_proximity")
@@ -487,21 +549,9 @@ class PredatorBrain(FuzzyBrain):
         actions = {}
         
         # Determine hunting action
+        # Strongest fired set, the first of them on a tie; "conserve" by default
         hunting_options = output_strengths.get("hunting", {})
-        max_strength = 0
-        best_hunting = "conserve"  # Default
-        
-        for hunt, strength in hunting_options.items():
-            if strength > max_strength:
-                max_strength = strength
-                if hunt == "chase":
-                    best_hunting = "chase"
-                elif hunt == "stalk":
-                    best_hunting = "stalk"
-                else:
-                    best_hunting = "conserve"
-                    
-        actions["hunting"] = best_hunting
+        actions["hunting"] = max(hunting_options, key=hunting_options.get, default="conserve")
         
         # Determine reproduction action
         repro_options = output_strengths.get("reproduction", {})
@@ -0,0 +1,193 @@
+"""
+Grid used by the predator-prey model
+
+Wraps Mesa's MultiGrid and keeps per-species agent counts for every cell
+in NumPy arrays, so drawing and population queries don't need to walk
+the per-cell agent lists. Grass is not an agent at all: it only exists as
+the grid's grass_count array.
+"""
+
+from collections import defaultdict
+
+import mesa
+import numpy as np
+
+from models.kernels import add_to_window, occupied_in_window
+
+# Per-cell counts stay small (a few agents per cell, a few dozen in a
+# near window), so 16-bit counters are plenty and halve the array sizes.
+COUNT_DTYPE = np.int16
+
+
+class CountingMultiGrid(mesa.space.MultiGrid):
+    """
+    MultiGrid that keeps grass/herbivore/predator counts per cell.
+
+    The count arrays are indexed [x, y] like the grid itself. The animal
+    counts are updated whenever an agent is placed, moved or removed; grass
+    is added and eaten with add_grass() / remove_grass(), which also keep
+    the `grass_total` of all cells up to date.
+
+    `grass_near` and `pred_near` hold, for every cell, how much grass / how
+    many predators are within `near_radius` cells of it (Moore
+    neighborhood, center included). Agents use them to skip neighborhood
+    scans that would find nothing. Both are views into one interleaved
+    (width, height, 2) array, so a cell's two values share a cache line.
+
+    `agents_by_type` maps each agent class to the set of its agents
+    currently on the grid.
+
+    `placed_agents` holds every agent on the grid (dict used as an
+    ordered set), in the order they were last placed.
+    """
+    def __init__(self, width, height, torus, near_radius=3):
+        super().__init__(width, height, torus)
+        self.near_radius = near_radius
+        self.grass_count = np.zeros((width, height), dtype=COUNT_DTYPE)
+        self.grass_total = 0
+        self.herb_count = np.zeros((width, height), dtype=COUNT_DTYPE)
+        self.pred_count = np.zeros((width, height), dtype=COUNT_DTYPE)
+        self._near = np.zeros((width, height, 2), dtype=COUNT_DTYPE)
+        self.grass_near = self._near[..., 0]
+        self.pred_near = self._near[..., 1]
+        self.agents_by_type = defaultdict(set)
+        self.placed_agents = {}
+        self._tracking_by_type = {}
+        self._window_offsets = {}
+        self._window_cache = {}
+
+    def _counts_for(self, agent):
+        """
+        Return the (count, near) arrays tracking this agent's species
+        (agent may also be the agent class itself). The species flags
+        are class attributes, so they are only looked up once per class.
+        """
+        agent_type = agent if isinstance(agent, type) else type(agent)
+        tracking = self._tracking_by_type.get(agent_type)
+        if tracking is None:
+            if getattr(agent_type, "is_herbivore", False):
+                tracking = (self.herb_count, None)
+            elif getattr(agent_type, "is_predator", False):
+                tracking = (self.pred_count, self.pred_near)
+            else:
+                tracking = (None, None)
+            self._tracking_by_type[agent_type] = tracking
+        return tracking
+
+    def window_axes(self, pos, radius):
+        """
+        Return the x and y coordinates of the (2 * radius + 1)-wide square
+        window centered on pos, wrapped (torus) or clipped to the grid.
+
+        Like Mesa's neighborhood cache, the axes are memoized per
+        (pos, radius); the returned arrays are read-only.
+        """
+        key = (pos, radius)
+        axes = self._window_cache.get(key)
+        if axes is not None:
+            return axes
+        offsets = self._window_offsets.get(radius)
+        if offsets is None:
+            offsets = self._window_offsets[radius] = np.arange(-radius, radius + 1)
+        xs = pos[0] + offsets
+        ys = pos[1] + offsets
+        if self.torus:
+            xs %= self.width
+            ys %= self.height
+            # A window wider than the grid wraps onto itself: keep each
+            # coordinate once, where it first appears, like Mesa does
+            if len(xs) > self.width:
+                xs = xs[np.sort(np.unique(xs, return_index=True)[1])]
+            if len(ys) > self.height:
+                ys = ys[np.sort(np.unique(ys, return_index=True)[1])]
+        else:
+            xs = xs[(xs >= 0) & (xs < self.width)]
+            ys = ys[(ys >= 0) & (ys < self.height)]
+        xs.flags.writeable = False
+        ys.flags.writeable = False
+        axes = self._window_cache[key] = (xs, ys)
+        return axes
+
+    def occupied_cells(self, counts, pos, radius):
+        """
+        Return (cell, count) for every cell within radius of pos (Moore
+        neighborhood, center excluded) whose count is nonzero, in the same
+        order get_neighborhood() lists the cells.
+        """
+        xs, ys = self.window_axes(pos, radius)
+        cell_xs, cell_ys, cell_counts = occupied_in_window(counts, xs, ys, pos[0], pos[1])
+        return [((x, y), count) for x, y, count
+                in zip(cell_xs.tolist(), cell_ys.tolist(), cell_counts.tolist())]
+
+    def add_grass(self, pos):
+        """Grow one unit of grass in the cell"""
+        self.grass_count[pos] += 1
+        self.grass_total += 1
+        self._add_near(self.grass_near, pos, 1)
+
+    def remove_grass(self, pos):
+        """Eat one unit of grass from the cell; returns False if there is none"""
+        if not self.grass_count[pos]:
+            return False
+        self.grass_count[pos] -= 1
+        self.grass_total -= 1
+        self._add_near(self.grass_near, pos, -1)
+        return True
+
+    def is_blocked(self, pos):
+        """Whether an animal (herbivore or predator) occupies the cell"""
+        return bool(self.herb_count[pos] or self.pred_count[pos])
+
+    def _add_near(self, near, pos, delta):
+        """Add delta to the near counts of the cells within near_radius of pos"""
+        add_to_window(near, pos[0], pos[1], self.near_radius, delta, self.torus)
+
+    def place_agent(self, agent, pos):
+        """Place the agent and count it in its new cell"""
+        already_there = agent.pos == pos
+        super().place_agent(agent, pos)
+        if already_there:
+            return
+        self.agents_by_type[type(agent)].add(agent)
+        self.placed_agents[agent] = None
+        counts, near = self._counts_for(agent)
+        if counts is not None:
+            counts[agent.pos] += 1
+            if near is not None:
+                self._add_near(near, agent.pos, 1)
+
+    def place_agents(self, agents, positions):
+        """
+        Place agents that are not on the grid yet, e.g. the initial
+        populations, at their positions. Same as calling place_agent()
+        for each of them, but the counts of each species are added in
+        one go.
+        """
+        placed = {}
+        for agent, pos in zip(agents, positions):
+            super().place_agent(agent, pos)
+            self.agents_by_type[type(agent)].add(agent)
+            self.placed_agents[agent] = None
+            placed.setdefault(type(agent), []).append(pos)
+
+        for agent_type, cells in placed.items():
+            counts, near = self._counts_for(agent_type)
+            if counts is None:
+                continue
+            xs, ys = np.array(cells).T
+            np.add.at(counts, (xs, ys), 1)
+            if near is not None:
+                for pos in cells:
+                    self._add_near(near, pos, 1)
+
+    def remove_agent(self, agent):
+        """Remove the agent and uncount it from its old cell"""
+        pos = agent.pos
+        super().remove_agent(agent)
+        self.agents_by_type[type(agent)].discard(agent)
+        self.placed_agents.pop(agent, None)
+        counts, near = self._counts_for(agent)
+        if counts is not None:
+            counts[pos] -= 1
+            if near is not None:
+                self._add_near(near, pos, -1)
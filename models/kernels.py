@@ -0,0 +1,216 @@
+"""
+Numeric kernels for the per-step neighborhood queries and fuzzy rules
+
+The grid kernels work directly on the grid's per-cell count arrays instead
+of walking Mesa's per-cell agent lists; rule_strengths evaluates a fuzzy
+brain's rule base lowered to arrays. When numba is installed the kernels
+are compiled with njit; otherwise equivalent NumPy versions are used.
+
+The kernels are serial on purpose. Each one reads a window of at most a
+few dozen cells, far too little work to split across threads, and the
+agent updates themselves can't run in parallel: agents step one at a time
+in shuffled order and every move, meal or birth changes what the next
+agent sees.
+"""
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional
+    numba = None
+
+
+def _nearest_occupied_numpy(counts, xs, ys, x, y):
+    """NumPy version of nearest_occupied"""
+    window = counts[np.ix_(xs, ys)]
+    dist = np.abs(xs - x)[:, None] + np.abs(ys - y)[None, :]
+    occupied = (window > 0) & (dist > 0)
+    if not occupied.any():
+        return -1, 0
+    return int(dist[occupied].min()), int(window[occupied].sum())
+
+
+def _nearest_occupied_loop(counts, xs, ys, x, y):
+    """Loop version of nearest_occupied, compiled when numba is available"""
+    best = -1
+    total = 0
+    for i in range(xs.shape[0]):
+        dx = abs(xs[i] - x)
+        for j in range(ys.shape[0]):
+            count = counts[xs[i], ys[j]]
+            dist = dx + abs(ys[j] - y)
+            if count > 0 and dist > 0:
+                total += count
+                if best < 0 or dist < best:
+                    best = dist
+    return best, total
+
+
+if numba is not None:
+    _nearest_occupied = numba.njit(cache=True)(_nearest_occupied_loop)
+else:
+    _nearest_occupied = _nearest_occupied_numpy
+
+
+def _occupied_in_window_numpy(counts, xs, ys, x, y):
+    """NumPy version of occupied_in_window"""
+    window = counts[np.ix_(xs, ys)]
+    occupied = (window > 0) & ((xs != x)[:, None] | (ys != y)[None, :])
+    i, j = np.nonzero(occupied)
+    return xs[i], ys[j], window[i, j]
+
+
+def _occupied_in_window_loop(counts, xs, ys, x, y):
+    """Loop version of occupied_in_window, compiled when numba is available"""
+    size = xs.shape[0] * ys.shape[0]
+    cell_xs = np.empty(size, np.int64)
+    cell_ys = np.empty(size, np.int64)
+    cell_counts = np.empty(size, np.int64)
+    n = 0
+    for i in range(xs.shape[0]):
+        for j in range(ys.shape[0]):
+            count = counts[xs[i], ys[j]]
+            if count > 0 and (xs[i] != x or ys[j] != y):
+                cell_xs[n] = xs[i]
+                cell_ys[n] = ys[j]
+                cell_counts[n] = count
+                n += 1
+    return cell_xs[:n], cell_ys[:n], cell_counts[:n]
+
+
+if numba is not None:
+    _occupied_in_window = numba.njit(cache=True)(_occupied_in_window_loop)
+else:
+    _occupied_in_window = _occupied_in_window_numpy
+
+
+def occupied_in_window(counts, xs, ys, x, y):
+    """
+    List the occupied cells in the window spanned by xs and ys
+
+    Args:
+        counts: Per-cell count array indexed [x, y]
+        xs, ys: Window coordinates (see CountingMultiGrid.window_axes)
+        x, y: Position of the window's center, which is skipped
+
+    Returns:
+        Arrays (cell x, cell y, count) of the cells with a nonzero count,
+        x-major like the window itself
+    """
+    return _occupied_in_window(counts, xs, ys, x, y)
+
+
+def nearest_occupied(counts, xs, ys, x, y):
+    """
+    Find the closest occupied cell in the window spanned by xs and ys
+
+    Args:
+        counts: Per-cell count array indexed [x, y]
+        xs, ys: Window coordinates (see CountingMultiGrid.window_axes)
+        x, y: Position the distances are measured from; this cell
+            itself is skipped
+
+    Returns:
+        Tuple (closest Manhattan distance or -1 if none, total count)
+    """
+    return _nearest_occupied(counts, xs, ys, x, y)
+
+
+def _add_to_window_numpy(arr, x, y, radius, delta, torus):
+    """NumPy version of add_to_window"""
+    offsets = np.arange(-radius, radius + 1)
+    xs = x + offsets
+    ys = y + offsets
+    if torus:
+        # A window wider than the array covers each cell of that axis once
+        xs = np.arange(arr.shape[0]) if len(xs) > arr.shape[0] else xs % arr.shape[0]
+        ys = np.arange(arr.shape[1]) if len(ys) > arr.shape[1] else ys % arr.shape[1]
+    else:
+        xs = xs[(xs >= 0) & (xs < arr.shape[0])]
+        ys = ys[(ys >= 0) & (ys < arr.shape[1])]
+    arr[np.ix_(xs, ys)] += delta
+
+
+def _add_to_window_loop(arr, x, y, radius, delta, torus):
+    """Loop version of add_to_window, compiled when numba is available"""
+    width, height = arr.shape[0], arr.shape[1]
+    x_start, x_stop = x - radius, x + radius + 1
+    y_start, y_stop = y - radius, y + radius + 1
+    if torus:
+        # A window wider than the array covers each cell of that axis once
+        if x_stop - x_start > width:
+            x_start, x_stop = 0, width
+        if y_stop - y_start > height:
+            y_start, y_stop = 0, height
+    for cell_x in range(x_start, x_stop):
+        if torus:
+            cell_x %= width
+        elif cell_x < 0 or cell_x >= width:
+            continue
+        for cell_y in range(y_start, y_stop):
+            if torus:
+                cell_y %= height
+            elif cell_y < 0 or cell_y >= height:
+                continue
+            arr[cell_x, cell_y] += delta
+
+
+if numba is not None:
+    _add_to_window = numba.njit(cache=True)(_add_to_window_loop)
+else:
+    _add_to_window = _add_to_window_numpy
+
+
+def add_to_window(arr, x, y, radius, delta, torus):
+    """
+    Add delta to every cell within radius of (x, y) (Moore neighborhood,
+    center included), wrapping around the edges on a torus and clipping
+    to the array otherwise; each cell gets delta once, even when the
+    window is wider than the array
+    """
+    _add_to_window(arr, x, y, radius, delta, torus)
+
+
+def _rule_strengths_numpy(degrees, rule_slots, weights):
+    """NumPy version of rule_strengths"""
+    used = rule_slots >= 0
+    lowest = np.where(used, degrees[rule_slots], np.inf).min(axis=1)
+    return np.where(used.any(axis=1), lowest, 0.0) * weights
+
+
+def _rule_strengths_loop(degrees, rule_slots, weights):
+    """Loop version of rule_strengths, compiled when numba is available"""
+    strengths = np.zeros(rule_slots.shape[0])
+    for i in range(rule_slots.shape[0]):
+        lowest = np.inf
+        for j in range(rule_slots.shape[1]):
+            slot = rule_slots[i, j]
+            if slot >= 0 and degrees[slot] < lowest:
+                lowest = degrees[slot]
+        if lowest < np.inf:
+            strengths[i] = lowest * weights[i]
+    return strengths
+
+
+if numba is not None:
+    _rule_strengths = numba.njit(cache=True)(_rule_strengths_loop)
+else:
+    _rule_strengths = _rule_strengths_numpy
+
+
+def rule_strengths(degrees, rule_slots, weights):
+    """
+    Compute the firing strength of every fuzzy rule (Mamdani AND: the
+    smallest of its antecedents' membership degrees, times its weight)
+
+    Args:
+        degrees: Flat array of the membership degrees of all input sets
+        rule_slots: (rules, antecedents) array of indices into degrees,
+            padded with -1; a rule without antecedents never fires
+        weights: Weight of each rule
+
+    Returns:
+        Array with each rule's firing strength
+    """
+    return _rule_strengths(degrees, rule_slots, weights)
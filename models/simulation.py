@@ -1,9 +1,13 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
 import mesa
 import numpy as np
 
-from models.agents.grass import Grass
+from models.agents.grass import spread_grass
 from models.agents.herbivore import Herbivore
 from models.agents.predator import Predator
+from models.grid import CountingMultiGrid
 from models.config import (
     HERBIVORE_INIT_ENERGY, 
     HERBIVORE_MAX_ENERGY,
@@ -38,7 +42,7 @@ class PPModel(mesa.Model):
         super().__init__(seed=seed)
         self.num_herbivores = initial_herbivores
         self.num_predators = initial_predators
-        self.grid = mesa.space.MultiGrid(width, height, True)
+        self.grid = CountingMultiGrid(width, height, True)
         self.width = width
         self.height = height
 
@@ -74,27 +78,30 @@ class PPModel(mesa.Model):
 
     def initialize_herbivores(self, count):
         """Create initial herbivores and place them on the grid"""
+        herbivores, positions = [], []
         for i in range(count):
             x = self.random.randrange(self.grid.width)
             y = self.random.randrange(self.grid.height)
-            herbivore = Herbivore(self, energy=self.random.randint(30, 70))
-            self.grid.place_agent(herbivore, (x, y))
+            herbivores.append(Herbivore(self, energy=self.random.randint(30, 70)))
+            positions.append((x, y))
+        self.grid.place_agents(herbivores, positions)
     
     def initialize_predators(self, count):
         """Create initial predators and place them on the grid"""
+        predators, positions = [], []
         for i in range(count):
             x = self.random.randrange(self.grid.width)
             y = self.random.randrange(self.grid.height)
-            predator = Predator(self, energy=self.random.randint(60, 100))
-            self.grid.place_agent(predator, (x, y))
+            predators.append(Predator(self, energy=self.random.randint(60, 100)))
+            positions.append((x, y))
+        self.grid.place_agents(predators, positions)
     
     def initialize_grass(self, initial_amount):
-        """Create initial grass and place it on the grid"""
+        """Create initial grass on the grid"""
         for i in range(initial_amount):
             x = self.random.randrange(self.grid.width)
             y = self.random.randrange(self.grid.height)
-            grass = Grass(self)
-            self.grid.place_agent(grass, (x, y))
+            self.grid.add_grass((x, y))
 
     def grow_grass(self):
         """Grow new grass with some probability - adjusted for balance"""
@@ -118,18 +125,19 @@ class PPModel(mesa.Model):
         # Try to grow grass based on current coverage
         if self.random.random() < growth_chance:
             num_new_grass = self.random.randint(1, max_new_patches)
+            grid = self.grid
+            width, height = grid.width, grid.height
+            randrange = self.random.randrange
             for _ in range(num_new_grass):
                 # Try to find an empty spot for new grass
                 # More attempts in sparse environments, fewer in dense ones
                 max_tries = 3  # Reduced from 5 for further slowing
                 for _ in range(max_tries):
-                    x = self.random.randrange(self.grid.width)
-                    y = self.random.randrange(self.grid.height)
+                    x = randrange(width)
+                    y = randrange(height)
                     # Check if cell is empty of grass
-                    cell_contents = self.grid.get_cell_list_contents([(x, y)])
-                    if not any(isinstance(agent, Grass) for agent in cell_contents):
-                        grass = Grass(self)
-                        self.grid.place_agent(grass, (x, y))
+                    if not grid.grass_count[x, y]:
+                        grid.add_grass((x, y))
                         break
 
     def step(self):
@@ -145,25 +153,54 @@ class PPModel(mesa.Model):
             if agent.pos is not None:  # Only process agents still on grid
                 agent.step()
         
+        # Spread the existing grass, all cells at once
+        spread_grass(self.grid, self.rng)
+        
         # Grow new grass
         self.grow_grass()
     
     def get_all_agents(self):
         """Get all agents from the grid"""
-        agent_list = []
-        for contents, (x, y) in self.grid.coord_iter():
-            agent_list.extend(contents)
-        return agent_list
+        # Taken from the grid's registry rather than walking every cell
+        return list(self.grid.placed_agents)
     
     def compute_grass_coverage(self):
         """Compute the percentage of grid covered by grass"""
-        grass_count = sum(1 for agent in self.get_all_agents() if isinstance(agent, Grass))
-        return (grass_count / (self.width * self.height)) * 100
+        grass_count = self.grid.grass_total
+        return (grass_count / self.grid.num_cells) * 100
     
     def compute_herbivore_population(self):
         """Count the number of herbivores"""
-        return sum(1 for agent in self.get_all_agents() if isinstance(agent, Herbivore))
+        return len(self.grid.agents_by_type[Herbivore])
     
     def compute_predator_population(self):
         """Count the number of predators"""
-        return sum(1 for agent in self.get_all_agents() if isinstance(agent, Predator))
\ No newline at end of file
+        return len(self.grid.agents_by_type[Predator])
+
+
+def _run_replicate(seed, steps, model_params):
+    """Run one seeded model for the given number of steps and return its collected data"""
+    # The agents draw from the global random module, so seed it for this run too
+    random.seed(seed)
+    model = PPModel(seed=seed, **model_params)
+    for _ in range(steps):
+        model.step()
+    return model.datacollector.get_model_vars_dataframe()
+
+
+def run_replicates(seeds, steps, max_workers=None, **model_params):
+    """Run independent replicates of the model in parallel worker processes
+
+    Args:
+        seeds: One seed per replicate
+        steps: Number of steps to run each replicate for
+        max_workers: Number of worker processes (defaults to the CPU count)
+        **model_params: Parameters passed to every PPModel
+
+    Returns:
+        List of the replicates' collected data (DataFrames), in seed order
+    """
+    seeds = list(seeds)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run_replicate, seeds, [steps] * len(seeds),
+                                 [model_params] * len(seeds)))